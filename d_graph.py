@@ -4,8 +4,13 @@
 # Description:  This file contains a class for an directed graph using a matrix to store links between nodes
 #               along with the weight. It also has methods to add vertices, edges, remove edges,
 #               find out if a path is valid, depth and breadth first searches, if the graph contains a cycle or not,
-#               and dijkstra's algorithm to find the shortest path to each node
+#               and dijkstra's algorithm to find the shortest path to each node. A reachability index can be built
+#               to answer "can u reach v?" queries in constant time, and read only subgraph and filtered edge views
+#               can be taken without copying the matrix
 
+import sys
+import threading
+import weakref
 from collections import deque
 
 
@@ -18,6 +23,14 @@ class DirectedGraph:
     - vertex names are integers
     """
 
+    # bumped on every mutation so a cached reachability index knows when it is stale
+    _version = 0
+    _reach_index = None
+    _reach_lock = threading.Lock()
+
+    # views taken of the graph, told to drop their copied rows on every mutation
+    _views = None
+
     def __init__(self, start_edges=None):
         """
         Store graph info as adjacency matrix
@@ -64,6 +77,7 @@ class DirectedGraph:
         for vertex in self.adj_matrix:
             vertex.append(0)
         self.v_count += 1
+        self.changed()
         return self.v_count
 
     def add_edge(self, src: int, dst: int, weight=1) -> None:
@@ -78,6 +92,7 @@ class DirectedGraph:
             return
 
         self.adj_matrix[src][dst] = weight
+        self.changed()
 
     def remove_edge(self, src: int, dst: int) -> None:
         """
@@ -87,6 +102,16 @@ class DirectedGraph:
             return
         if src < self.v_count and dst < self.v_count:
             self.adj_matrix[src][dst] = 0
+            self.changed()
+
+    def changed(self) -> None:
+        """
+        Bumps the version of the graph and tells every view of it that its copied rows are out of date
+        """
+        self._version += 1
+        if self._views is not None:
+            for view in list(self._views):
+                view.invalidate()
 
     def get_vertices(self) -> []:
         """
@@ -267,6 +292,316 @@ class DirectedGraph:
 
         return index
 
+    def reachability_index(self):
+        """
+        Returns a ReachabilityIndex for the graph. The index is cached on the graph and rebuilds itself the next
+        time it is queried after the graph has been changed
+        """
+        if self._reach_index is None:
+            with self._reach_lock:
+                if self._reach_index is None:
+                    self._reach_index = ReachabilityIndex(self)
+        return self._reach_index
+
+    def reaches(self, src: int, dst: int) -> bool:
+        """
+        Returns True if there is a path from src to dst (every vertex reaches itself), False otherwise
+        """
+        return self.reachability_index().reaches(src, dst)
+
+    def subgraph(self, vertices: []):
+        """
+        Returns a read only view of the graph induced by the given vertices. Vertex i of the view is vertices[i] of
+        this graph, vertices that aren't in the graph and repeated vertices are skipped
+        """
+        return self.add_view(DirectedGraphView(self, vertices=vertices))
+
+    def filter_edges(self, predicate):
+        """
+        Returns a read only view of the graph that only keeps the edges where predicate(src, dst, weight) is True
+        """
+        return self.add_view(DirectedGraphView(self, predicate=predicate))
+
+    def add_view(self, view):
+        """
+        Remembers a view of the graph, without keeping it alive, so changes can be passed on to it
+        """
+        if self._views is None:
+            self._views = weakref.WeakSet()
+        self._views.add(view)
+        return view
+
+
+class DirectedGraphView(DirectedGraph):
+    """
+    Read only view of a DirectedGraph
+    - never copies the parent's matrix. The first query builds the view's own k x k matrix from the parent's
+      rows, so a subgraph of k vertices costs k * k reads no matter how big the parent is, and queries after
+      that run at the same speed as on a normal graph
+    - the parent tells the view when it changes, and the view rebuilds its matrix on the next query
+    - a subgraph view renumbers its vertices 0 to k - 1, a filtered view keeps the parent's numbering
+    - supports every query method of DirectedGraph, including further subgraph() and filter_edges() calls
+    """
+
+    def __init__(self, parent, vertices=None, predicate=None):
+        """
+        Store the parent graph along with the vertex mapping or edge predicate
+        """
+        self.parent = parent
+        self.predicate = predicate
+        self.vertex_map = None
+        if vertices is not None:
+            self.vertex_map = [x for x in dict.fromkeys(vertices) if 0 <= x < parent.v_count]
+        self.adj_matrix = MatrixView(self)
+
+    def invalidate(self) -> None:
+        """
+        Drops the built matrix after the parent changes, along with the matrices of any views of this view
+        """
+        self.adj_matrix = MatrixView(self)
+        if self._views is not None:
+            for view in list(self._views):
+                view.invalidate()
+
+    def materialize(self) -> []:
+        """
+        Builds the view's matrix from the parent and puts it in place of the MatrixView
+        """
+        rows = [self.build_row(src) for src in range(self.v_count)]
+        self.adj_matrix = rows
+        return rows
+
+    @property
+    def v_count(self) -> int:
+        """
+        Returns the number of vertices in the view
+        """
+        if self.vertex_map is None:
+            return self.parent.v_count
+        return len(self.vertex_map)
+
+    @property
+    def _version(self) -> int:
+        """
+        Returns the parent's version, so an index built on the view rebuilds when the parent changes
+        """
+        return self.parent._version
+
+    def parent_vertex(self, vertex: int) -> int:
+        """
+        Returns the parent graph's number for a vertex of the view
+        """
+        if self.vertex_map is None:
+            return vertex
+        return self.vertex_map[vertex]
+
+    def weight(self, src: int, dst: int):
+        """
+        Returns the weight of the edge from src to dst in the view, 0 if there is no edge
+        """
+        return self.adj_matrix[src][dst]
+
+    def build_row(self, src: int) -> []:
+        """
+        Returns a new list with the weights of the edges leaving src in the view
+        """
+        if self.vertex_map is not None:
+            parent_row = self.parent.adj_matrix[self.vertex_map[src]]
+            row = list(map(parent_row.__getitem__, self.vertex_map))
+        else:
+            row = list(self.parent.adj_matrix[src])
+        if self.predicate is not None:
+            for dst in range(len(row)):
+                if row[dst] != 0 and not self.predicate(src, dst, row[dst]):
+                    row[dst] = 0
+        return row
+
+    def add_vertex(self) -> int:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+    def add_edge(self, src: int, dst: int, weight=1) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+    def remove_edge(self, src: int, dst: int) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+
+class MatrixView:
+    """
+    Stands in for the adjacency matrix of a DirectedGraphView until it is first read. The first read builds the
+    view's matrix as a plain list of lists and puts it in place of the MatrixView, so later reads are list lookups
+    """
+
+    def __init__(self, view):
+        """
+        Store the view the matrix belongs to, the rows are built on first use
+        """
+        self.view = view
+        self.rows = None
+
+    def __len__(self):
+        """
+        Returns the number of rows
+        """
+        return self.view.v_count
+
+    def __getitem__(self, src):
+        """
+        Returns the row of edges leaving src
+        """
+        if self.rows is None:
+            self.rows = self.view.materialize()
+        return self.rows[src]
+
+    def __iter__(self):
+        """
+        Returns every row in order
+        """
+        if self.rows is None:
+            self.rows = self.view.materialize()
+        return iter(self.rows)
+
+
+class ReachabilityIndex:
+    """
+    Transitive closure of a DirectedGraph for constant time reachability queries
+    - strongly connected components are condensed first, so every vertex in a cycle shares one entry
+    - each component stores the set of components it reaches as a bytearray bitset, so a lookup reads one byte
+    - rebuilt lazily the first time it is queried after the graph changes, a lock makes sure threads that query
+      a stale index at the same time only build it once
+    """
+
+    def __init__(self, graph):
+        """
+        Store a reference to the graph, the index itself is built on first use
+        """
+        self.graph = graph
+        self.version = None
+        self.component = []
+        self.closure = []
+        self.lock = threading.Lock()
+
+    def reaches(self, src: int, dst: int) -> bool:
+        """
+        Returns True if src can reach dst, False otherwise or if either vertex isn't in the graph
+        """
+        self.refresh()
+        if src < 0 or dst < 0 or src >= len(self.component) or dst >= len(self.component):
+            return False
+        row = self.closure[self.component[src]]
+        bit = self.component[dst]
+        return (row[bit >> 3] >> (bit & 7)) & 1 == 1
+
+    def component_count(self) -> int:
+        """
+        Returns the number of strongly connected components in the graph
+        """
+        self.refresh()
+        return len(self.closure)
+
+    def memory_usage(self) -> int:
+        """
+        Returns the approximate number of bytes used by the index
+        """
+        self.refresh()
+        total = sys.getsizeof(self.component) + sys.getsizeof(self.closure)
+        total += sum(sys.getsizeof(bits) for bits in self.closure)
+        return total
+
+    def refresh(self) -> None:
+        """
+        Builds the index if the graph has changed since it was last built
+        """
+        if self.version != self.graph._version:
+            with self.lock:
+                if self.version != self.graph._version:
+                    self.build()
+
+    def build(self) -> None:
+        """
+        Finds the strongly connected components with an iterative version of Tarjan's algorithm, then fills in the
+        closure bitsets. Tarjan finishes components in reverse topological order, so every component a component
+        links to already has its closure when it is reached
+        """
+        length = self.graph.v_count
+        successors = [[x for x, weight in enumerate(row) if weight != 0] for row in self.graph.adj_matrix]
+
+        order = [None for x in range(length)]
+        low = [0 for x in range(length)]
+        on_stack = [False for x in range(length)]
+        component = [None for x in range(length)]
+        closure = []
+        stack = []
+        counter = 0
+
+        for root in range(length):
+            if order[root] is not None:
+                continue
+
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+
+            while len(work) != 0:
+                current, index = work[-1]
+                neighbours = successors[current]
+
+                if index < len(neighbours):
+                    work[-1] = (current, index + 1)
+                    link = neighbours[index]
+                    if order[link] is None:
+                        order[link] = low[link] = counter
+                        counter += 1
+                        stack.append(link)
+                        on_stack[link] = True
+                        work.append((link, 0))
+                    elif on_stack[link] and order[link] < low[current]:
+                        low[current] = order[link]
+                    continue
+
+                work.pop()
+                if len(work) != 0:
+                    parent = work[-1][0]
+                    if low[current] < low[parent]:
+                        low[parent] = low[current]
+
+                if low[current] == order[current]:
+                    # current is the root of a component, pop its members and build its closure
+                    number = len(closure)
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = number
+                        members.append(member)
+                        if member == current:
+                            break
+
+                    bits = 1 << number
+                    for member in members:
+                        for link in successors[member]:
+                            if component[link] != number:
+                                bits |= closure[component[link]]
+                    closure.append(bits)
+
+        # the closures are built as ints because OR is fast on them, but shifting a big int to test one bit costs
+        # time proportional to its length, so each one is stored as bytes for the lookups
+        size = (len(closure) + 7) // 8
+        self.component = component
+        self.closure = [bytearray(bits.to_bytes(size, 'little')) for bits in closure]
+        self.version = self.graph._version
+
 
 if __name__ == '__main__':
     #
@@ -0,0 +1,298 @@
+# Description:  This file contains an asyncio query server for the DirectedGraph and UndirectedGraph classes. Clients
+#               connect over a TCP or Unix socket and send one JSON request per line. Identical queries that are
+#               running at the same time are merged into one computation, searches are run in a worker thread pool
+#               so they don't run on the event loop, and the latency of every method is recorded in a histogram
+
+import argparse
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+from d_graph import DirectedGraph
+
+
+def run_query(function, args: []):
+    """
+    Calls a graph method and returns its result. StopIteration and exceptions that aren't an Exception (like
+    KeyboardInterrupt) can't be stored in an asyncio future, so they are raised again as a RuntimeError
+    """
+    try:
+        return function(*args)
+    except StopIteration as error:
+        raise RuntimeError(f'{function.__name__} raised StopIteration') from error
+    except Exception:
+        raise
+    except BaseException as error:
+        raise RuntimeError(f'{function.__name__} raised {type(error).__name__}') from error
+
+
+def to_json(value):
+    """
+    Returns a copy of a query result that can be sent as strict JSON, infinite and NaN floats become None and
+    tuples become lists
+    """
+    if isinstance(value, float) and (value != value or value in (float('inf'), float('-inf'))):
+        return None
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    return value
+
+
+class LatencyHistogram:
+    """
+    Class to count request latencies in fixed millisecond buckets
+    - a bucket counts every request at or below its bound and above the previous bound
+    - the last bucket is unbounded
+    """
+
+    BOUNDS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float('inf')]
+
+    def __init__(self):
+        """
+        Store one counter per bucket along with the totals
+        """
+        self.counts = [0 for x in self.BOUNDS]
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, millis: float) -> None:
+        """
+        Adds a latency in milliseconds to the histogram
+        """
+        self.counts[bisect_left(self.BOUNDS, millis)] += 1
+        self.count += 1
+        self.total += millis
+        if millis > self.maximum:
+            self.maximum = millis
+
+    def to_dict(self) -> dict:
+        """
+        Returns the histogram in a form that can be sent as JSON
+        """
+        buckets = {}
+        for bound, count in zip(self.BOUNDS, self.counts):
+            buckets['inf' if bound == float('inf') else str(bound)] = count
+
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count != 0 else 0.0,
+            'max_ms': self.maximum,
+            'buckets': buckets,
+        }
+
+
+class GraphQueryServer:
+    """
+    Class to serve read only queries on a graph over a line delimited JSON protocol
+    - requests look like {"id": 1, "method": "dijkstra", "args": [0]}
+    - responses look like {"id": 1, "result": [...]} or {"id": 1, "error": "..."}
+    - responses are strict JSON, infinite distances (unreachable vertices in dijkstra) are sent as null
+    - the "stats" method returns the latency histogram of every method, failed requests for unknown methods are
+      counted together under "invalid"
+    - request lines longer than limit bytes get an error response and the connection is closed
+    - each connection has at most max_pending requests running, the server stops reading from a connection until
+      one of them finishes
+    - the graph must not be changed while it is being served
+
+    The worker pool is a ThreadPoolExecutor by default. The graph methods are pure Python and hold the GIL, so the
+    workers don't run in parallel with each other and still take turns with the event loop: the pool keeps long
+    searches from stalling other connections, it doesn't add CPU throughput. Scale across cores by running one
+    server process per core.
+    """
+
+    # methods the clients are allowed to call on the graph
+    READ_METHODS = {'get_vertices', 'get_edges', 'is_valid_path', 'dfs', 'bfs', 'has_cycle', 'dijkstra',
+                    'count_connected_components', 'reaches', 'minimum_spanning_forest'}
+
+    # methods cheap enough to run directly on the event loop
+    INLINE_METHODS = {'get_vertices', 'is_valid_path'}
+
+    def __init__(self, graph, max_workers=None, executor=None, limit=2 ** 20, max_pending=64):
+        """
+        Store the graph and the worker pool used for the expensive queries
+        """
+        self.graph = graph
+        self.limit = limit
+        self.max_pending = max_pending
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers)
+        self.in_flight = {}
+        self.histograms = {}
+        self.servers = []
+
+    async def query(self, method: str, args: []):
+        """
+        Runs a method on the graph and returns the result. If the same query is already running, waits for that
+        result instead of starting another computation
+        """
+        if method not in self.READ_METHODS or not hasattr(self.graph, method):
+            raise ValueError(f'unknown method: {method}')
+
+        key = (method, json.dumps(args, sort_keys=True))
+        if key in self.in_flight:
+            return await asyncio.shield(self.in_flight[key])
+
+        loop = asyncio.get_running_loop()
+        function = getattr(self.graph, method)
+        if method in self.INLINE_METHODS:
+            future = loop.create_future()
+            try:
+                future.set_result(run_query(function, args))
+            except Exception as error:
+                future.set_exception(error)
+        else:
+            future = loop.run_in_executor(self.executor, run_query, function, args)
+
+        self.in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    def stats(self) -> dict:
+        """
+        Returns the latency histogram of every method that has been called
+        """
+        return {method: histogram.to_dict() for method, histogram in self.histograms.items()}
+
+    def encode(self, response: dict) -> bytes:
+        """
+        Returns a response as one line of strict JSON
+        """
+        try:
+            return json.dumps(to_json(response), allow_nan=False).encode() + b'\n'
+        except (TypeError, ValueError) as error:
+            response = {'id': to_json(response.get('id')), 'error': f'{type(error).__name__}: {error}'}
+            return json.dumps(response, allow_nan=False, default=str).encode() + b'\n'
+
+    async def handle_request(self, line: bytes, writer) -> None:
+        """
+        Decodes one request line, runs it and writes back the response
+        """
+        start = time.perf_counter()
+        request_id = None
+        method = None
+
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            method = request.get('method')
+            args = request.get('args', [])
+            if not isinstance(args, list):
+                raise ValueError('args must be a list')
+            if method == 'stats':
+                result = self.stats()
+            else:
+                result = await self.query(method, args)
+            response = {'id': request_id, 'result': result}
+        except Exception as error:
+            response = {'id': request_id, 'error': f'{type(error).__name__}: {error}'}
+
+        # only known methods get their own histogram, so clients can't add entries without limit
+        if not isinstance(method, str) or (method not in self.READ_METHODS and method != 'stats'):
+            method = 'invalid'
+        if method not in self.histograms:
+            self.histograms[method] = LatencyHistogram()
+        self.histograms[method].record((time.perf_counter() - start) * 1000)
+
+        if not writer.is_closing():
+            writer.write(self.encode(response))
+
+    async def handle_client(self, reader, writer) -> None:
+        """
+        Reads request lines from a client until it disconnects. Requests are handled concurrently, so responses may
+        come back in a different order than the requests were sent
+        """
+        tasks = set()
+        pending = asyncio.Semaphore(self.max_pending)
+        try:
+            while True:
+                # wait for a free slot before reading, so one client can't queue up unlimited work
+                await pending.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # readline raises ValueError when the line is longer than the stream limit
+                    response = {'id': None, 'error': f'ValueError: request line longer than {self.limit} bytes'}
+                    writer.write(self.encode(response))
+                    break
+                if not line:
+                    break
+                if line.strip() == b'':
+                    pending.release()
+                    continue
+                task = asyncio.ensure_future(self.handle_request(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda done: pending.release())
+                await writer.drain()
+            if len(tasks) != 0:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if len(tasks) != 0:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        """
+        Starts listening on a TCP socket and returns the asyncio server
+        """
+        server = await asyncio.start_server(self.handle_client, host, port, limit=self.limit)
+        self.servers.append(server)
+        return server
+
+    async def start_unix(self, path: str):
+        """
+        Starts listening on a Unix socket and returns the asyncio server
+        """
+        server = await asyncio.start_unix_server(self.handle_client, path, limit=self.limit)
+        self.servers.append(server)
+        return server
+
+    async def close(self) -> None:
+        """
+        Stops every listening socket and shuts down the worker pool
+        """
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        self.executor.shutdown(wait=False)
+
+
+async def serve(graph, host='127.0.0.1', port=8761, unix_path=None) -> None:
+    """
+    Serves a graph until the process is stopped
+    """
+    query_server = GraphQueryServer(graph)
+    if unix_path is not None:
+        server = await query_server.start_unix(unix_path)
+        print(f'serving on {unix_path}')
+    else:
+        server = await query_server.start_tcp(host, port)
+        print(f'serving on {host}:{server.sockets[0].getsockname()[1]}')
+    try:
+        await server.serve_forever()
+    finally:
+        await query_server.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Serve the PDF example directed graph')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8761)
+    parser.add_argument('--unix', default=None, help='path of a Unix socket to listen on instead of TCP')
+    options = parser.parse_args()
+
+    edges = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+             (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+    asyncio.run(serve(DirectedGraph(edges), options.host, options.port, options.unix))
@@ -0,0 +1,198 @@
+# Description:  Tests for d_graph.py. Reachability answers are checked against dfs on random graphs
+
+import random
+import sys
+import unittest
+
+from d_graph import DirectedGraph, DirectedGraphView, ReachabilityIndex
+
+
+def random_graph(rng, vertices: int, edges: int) -> DirectedGraph:
+    """
+    Returns a graph with the given number of vertices and up to the given number of random edges
+    """
+    graph = DirectedGraph()
+    for x in range(vertices):
+        graph.add_vertex()
+    for x in range(edges):
+        graph.add_edge(rng.randrange(vertices), rng.randrange(vertices), rng.randint(1, 20))
+    return graph
+
+
+class ReachabilityIndexTest(unittest.TestCase):
+
+    def assert_matches_dfs(self, graph: DirectedGraph) -> None:
+        """
+        Checks reaches() for every pair of vertices against the vertices dfs visits
+        """
+        for src in range(graph.v_count):
+            visited = set(graph.dfs(src))
+            for dst in range(graph.v_count):
+                self.assertEqual(graph.reaches(src, dst), dst in visited, (graph.get_edges(), src, dst))
+
+    def test_random_graphs_match_dfs(self):
+        rng = random.Random(26)
+        for x in range(200):
+            vertices = rng.randint(1, 15)
+            self.assert_matches_dfs(random_graph(rng, vertices, rng.randint(0, 3 * vertices)))
+
+    def test_components(self):
+        # 0 -> 1 -> 2 -> 0 is one component, 3 and 4 hang off it, 5 (loops are ignored) and 6 are isolated
+        graph = DirectedGraph([(0, 1, 1), (1, 2, 1), (2, 0, 1), (2, 3, 1), (4, 0, 1), (5, 5, 1)])
+        graph.add_vertex()
+        index = graph.reachability_index()
+
+        self.assertIsInstance(index, ReachabilityIndex)
+        self.assertEqual(index.component_count(), 5)
+        for src in range(3):
+            for dst in range(4):
+                self.assertTrue(graph.reaches(src, dst))
+        self.assertTrue(graph.reaches(4, 3))
+        self.assertFalse(graph.reaches(3, 0))
+        self.assertTrue(graph.reaches(5, 5))
+        self.assertFalse(graph.reaches(5, 0))
+        self.assertFalse(graph.reaches(0, 5))
+        self.assert_matches_dfs(graph)
+
+    def test_out_of_range_vertices(self):
+        graph = DirectedGraph([(0, 1, 1)])
+        self.assertFalse(graph.reaches(-1, 0))
+        self.assertFalse(graph.reaches(0, -1))
+        self.assertFalse(graph.reaches(0, 2))
+        self.assertFalse(graph.reaches(2, 0))
+        self.assertFalse(DirectedGraph().reaches(0, 0))
+
+    def test_rebuilds_after_changes(self):
+        graph = DirectedGraph([(0, 1, 1), (1, 2, 1)])
+        index = graph.reachability_index()
+        self.assertTrue(index.reaches(0, 2))
+        built = index.closure
+
+        # nothing changed, so the index is not rebuilt
+        self.assertTrue(index.reaches(0, 1))
+        self.assertIs(index.closure, built)
+
+        graph.remove_edge(1, 2)
+        self.assertFalse(index.reaches(0, 2))
+        self.assertIsNot(index.closure, built)
+
+        graph.add_edge(2, 0)
+        self.assertTrue(index.reaches(2, 1))
+        self.assertEqual(index.component_count(), 3)
+
+        graph.add_edge(1, 2)
+        self.assertEqual(index.component_count(), 1)
+
+        graph.add_vertex()
+        self.assertFalse(index.reaches(0, 3))
+        self.assertTrue(index.reaches(3, 3))
+        self.assertEqual(index.component_count(), 2)
+
+        # invalid changes are ignored and leave the answers alone
+        graph.add_edge(0, 9)
+        self.assertFalse(index.reaches(0, 9))
+        self.assertIs(graph.reachability_index(), index)
+
+    def test_memory_usage(self):
+        small = DirectedGraph([(0, 1, 1)]).reachability_index()
+        large = random_graph(random.Random(1), 300, 200).reachability_index()
+
+        self.assertGreater(small.memory_usage(), 0)
+        self.assertGreater(large.memory_usage(), small.memory_usage())
+        self.assertGreaterEqual(large.memory_usage(), sum(sys.getsizeof(row) for row in large.closure))
+
+
+def copy_subgraph(graph: DirectedGraph, vertices: [], predicate=None) -> DirectedGraph:
+    """
+    Returns a new graph holding the subgraph of the given vertices, numbered in the given order, with only the edges
+    the predicate keeps
+    """
+    copy = DirectedGraph()
+    for x in vertices:
+        copy.add_vertex()
+    for src, u in enumerate(vertices):
+        for dst, v in enumerate(vertices):
+            weight = graph.adj_matrix[u][v]
+            if weight != 0 and (predicate is None or predicate(src, dst, weight)):
+                copy.add_edge(src, dst, weight)
+    return copy
+
+
+class DirectedGraphViewTest(unittest.TestCase):
+
+    def assert_same_answers(self, view: DirectedGraph, copy: DirectedGraph) -> None:
+        """
+        Checks that every query method gives the same answer on the view and on the copied graph
+        """
+        self.assertEqual(view.v_count, copy.v_count)
+        self.assertEqual(str(view), str(copy))
+        self.assertEqual(view.get_edges(), copy.get_edges())
+        self.assertEqual(view.has_cycle(), copy.has_cycle())
+        for src in range(copy.v_count):
+            self.assertEqual(view.dfs(src), copy.dfs(src))
+            self.assertEqual(view.bfs(src), copy.bfs(src))
+            self.assertEqual(view.dijkstra(src), copy.dijkstra(src))
+            for dst in range(copy.v_count):
+                self.assertEqual(view.reaches(src, dst), copy.reaches(src, dst))
+                self.assertEqual(view.is_valid_path([src, dst]), copy.is_valid_path([src, dst]))
+
+    def test_random_views_match_copies(self):
+        rng = random.Random(29)
+        even = lambda src, dst, weight: weight % 2 == 0
+        for x in range(60):
+            graph = random_graph(rng, 10, 30)
+            vertices = rng.sample(range(10), rng.randint(1, 10))
+            self.assert_same_answers(graph.subgraph(vertices), copy_subgraph(graph, vertices))
+            self.assert_same_answers(graph.filter_edges(even), copy_subgraph(graph, range(10), even))
+            self.assert_same_answers(graph.subgraph(vertices).filter_edges(even),
+                                     copy_subgraph(graph, vertices, even))
+
+    def test_subgraph_remaps_vertices(self):
+        graph = DirectedGraph([(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3), (3, 1, 5), (2, 1, 23), (3, 2, 7)])
+        view = graph.subgraph([4, 3, 9, 1, 3, -1])
+
+        self.assertIsInstance(view, DirectedGraphView)
+        self.assertEqual(view.get_vertices(), [0, 1, 2])
+        self.assertEqual([view.parent_vertex(x) for x in range(3)], [4, 3, 1])
+        self.assertEqual(view.get_edges(), [(0, 1, 3), (1, 2, 5), (2, 0, 15)])
+        self.assertEqual(view.dijkstra(0), [0, 3, 8])
+        self.assertEqual(graph.filter_edges(lambda src, dst, weight: True).parent_vertex(2), 2)
+
+    def test_view_sees_parent_changes(self):
+        graph = DirectedGraph([(0, 1, 1), (1, 2, 1), (2, 3, 1)])
+        view = graph.subgraph([3, 2, 1])
+        nested = view.filter_edges(lambda src, dst, weight: weight < 5)
+        self.assertFalse(view.reaches(0, 2))
+        self.assertFalse(nested.reaches(0, 2))
+        self.assertEqual(view.dijkstra(2), [2, 1, 0])
+
+        graph.add_edge(3, 1, 4)
+        self.assertTrue(view.reaches(0, 2))
+        self.assertTrue(nested.reaches(0, 2))
+        self.assertEqual(view.get_edges(), [(0, 2, 4), (1, 0, 1), (2, 1, 1)])
+
+        graph.add_edge(3, 1, 9)
+        self.assertTrue(view.reaches(0, 2))
+        self.assertFalse(nested.reaches(0, 2))
+
+        graph.remove_edge(1, 2)
+        self.assertEqual(view.dijkstra(2), [float('inf'), float('inf'), 0])
+
+        # a filtered view of the whole graph grows with it
+        whole = graph.filter_edges(lambda src, dst, weight: True)
+        self.assertEqual(whole.v_count, 4)
+        graph.add_vertex()
+        graph.add_edge(4, 0)
+        self.assertEqual(whole.v_count, 4 + 1)
+        self.assertTrue(whole.reaches(4, 1))
+
+    def test_views_are_read_only(self):
+        view = DirectedGraph([(0, 1, 1)]).subgraph([0, 1])
+        for change in (view.add_vertex, lambda: view.add_edge(1, 0), lambda: view.remove_edge(0, 1)):
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(view.get_edges(), [(0, 1, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
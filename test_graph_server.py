@@ -0,0 +1,213 @@
+# Description:  Tests for graph_server.py. Each test starts a GraphQueryServer and talks to it with a real client
+#               over a TCP or Unix socket
+
+import asyncio
+import json
+import os
+import tempfile
+import random
+import threading
+import unittest
+from unittest import mock
+
+from d_graph import DirectedGraph, ReachabilityIndex
+from graph_server import GraphQueryServer
+from ud_graph import UndirectedGraph
+
+EDGES = [(0, 1, 10), (4, 0, 12), (1, 4, 15), (4, 3, 3),
+         (3, 1, 5), (2, 1, 23), (3, 2, 7)]
+
+
+class BlockingGraph(DirectedGraph):
+    """
+    DirectedGraph whose dijkstra counts its calls and waits until release is set, so queries stay in flight
+    """
+
+    def __init__(self, start_edges=None):
+        self.calls = 0
+        self.release = threading.Event()
+        super().__init__(start_edges)
+
+    def dijkstra(self, src: int) -> []:
+        self.calls += 1
+        self.release.wait(5)
+        return super().dijkstra(src)
+
+
+async def send(reader, writer, requests: []) -> []:
+    """
+    Writes the requests on one connection and returns the responses sorted by id
+    """
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for x in requests]
+    return sorted(responses, key=lambda response: response['id'])
+
+
+class GraphQueryServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def start(self, graph, **options):
+        """
+        Starts a TCP server for the graph and returns a function that opens client connections to it
+        """
+        self.server = GraphQueryServer(graph, **options)
+        listener = await self.server.start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        self.writers = []
+
+        async def connect():
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            self.writers.append(writer)
+            return reader, writer
+
+        return connect
+
+    async def asyncTearDown(self):
+        for writer in self.writers:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+        await self.server.close()
+
+    async def test_identical_queries_are_coalesced(self):
+        graph = BlockingGraph(EDGES)
+        connect = await self.start(graph)
+        clients = [await connect() for x in range(50)]
+
+        tasks = [asyncio.ensure_future(send(reader, writer, [{'id': i, 'method': 'dijkstra', 'args': [2]}]))
+                 for i, (reader, writer) in enumerate(clients)]
+        while len(self.server.in_flight) == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        graph.release.set()
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(graph.calls, 1)
+        for responses in results:
+            self.assertEqual(responses[0]['result'], [50, 23, 0, 41, 38])
+        self.assertEqual(self.server.in_flight, {})
+
+    async def test_pending_requests_per_connection_are_capped(self):
+        graph = BlockingGraph(EDGES)
+        connect = await self.start(graph, max_pending=2)
+        reader, writer = await connect()
+
+        task = asyncio.ensure_future(send(reader, writer, [{'id': i, 'method': 'dijkstra', 'args': [i]}
+                                                           for i in range(5)]))
+        while len(self.server.in_flight) < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        self.assertEqual(len(self.server.in_flight), 2)
+        self.assertEqual(graph.calls, 2)
+
+        graph.release.set()
+        responses = await asyncio.wait_for(task, 5)
+        self.assertEqual(graph.calls, 5)
+        self.assertEqual(responses[2]['result'], [50, 23, 0, 41, 38])
+
+    async def test_cold_reachability_index_is_built_once(self):
+        rng = random.Random(27)
+        graph = DirectedGraph([(rng.randrange(600), rng.randrange(600), 1) for x in range(1200)])
+        connect = await self.start(graph, max_workers=8)
+        clients = [await connect() for x in range(8)]
+
+        builds = []
+        build = ReachabilityIndex.build
+
+        def counting_build(index):
+            builds.append(index)
+            build(index)
+
+        with mock.patch.object(ReachabilityIndex, 'build', counting_build):
+            results = await asyncio.gather(*[send(reader, writer, [{'id': i, 'method': 'reaches', 'args': [i, 599]}])
+                                             for i, (reader, writer) in enumerate(clients)])
+
+        self.assertEqual(len(builds), 1)
+        for i, responses in enumerate(results):
+            self.assertEqual(responses[0]['result'], 599 in graph.bfs(i))
+
+    async def test_unreachable_distances_are_null(self):
+        connect = await self.start(DirectedGraph([(0, 1, 3), (2, 1, 1)]))
+        reader, writer = await connect()
+        writer.write(b'{"id": 1, "method": "dijkstra", "args": [0]}\n')
+        await writer.drain()
+        line = await reader.readline()
+        self.assertNotIn(b'Infinity', line)
+        self.assertEqual(json.loads(line), {'id': 1, 'result': [0, 3, None]})
+
+    async def test_stop_iteration_becomes_error(self):
+        connect = await self.start(UndirectedGraph())
+        reader, writer = await connect()
+        requests = [{'id': 1, 'method': 'has_cycle'}, {'id': 2, 'method': 'has_cycle'},
+                    {'id': 3, 'method': 'count_connected_components'}]
+        responses = await asyncio.wait_for(send(reader, writer, requests), 5)
+        for response in responses:
+            self.assertIn('StopIteration', response['error'])
+        self.assertEqual(self.server.in_flight, {})
+
+        # the same query still answers after the failure
+        responses = await asyncio.wait_for(send(reader, writer, requests[:1]), 5)
+        self.assertIn('error', responses[0])
+
+    async def test_error_responses(self):
+        connect = await self.start(DirectedGraph(EDGES))
+        reader, writer = await connect()
+        requests = [{'id': 1, 'method': 'nope'}, {'id': 2, 'method': 'bfs', 'args': 'x'},
+                    {'id': 3, 'method': 'add_edge', 'args': [0, 2]}, {'id': 4, 'method': 'dfs', 'args': [0]}]
+        responses = await send(reader, writer, requests)
+        self.assertEqual(responses[0]['error'], 'ValueError: unknown method: nope')
+        self.assertEqual(responses[1]['error'], 'ValueError: args must be a list')
+        self.assertIn('unknown method', responses[2]['error'])
+        self.assertEqual(responses[3]['result'], [0, 1, 4, 3, 2])
+
+        writer.write(b'not json\n')
+        await writer.drain()
+        self.assertIn('JSONDecodeError', json.loads(await reader.readline())['error'])
+
+    async def test_stats_only_tracks_known_methods(self):
+        connect = await self.start(DirectedGraph(EDGES))
+        reader, writer = await connect()
+        requests = [{'id': i, 'method': f'junk{i}'} for i in range(5)]
+        requests += [{'id': 5, 'method': 'bfs', 'args': [0]}, {'id': 6, 'method': None}]
+        await send(reader, writer, requests)
+        stats = (await send(reader, writer, [{'id': 7, 'method': 'stats'}]))[0]['result']
+
+        self.assertEqual(set(stats), {'invalid', 'bfs'})
+        self.assertEqual(stats['invalid']['count'], 6)
+        self.assertEqual(stats['bfs']['count'], 1)
+        self.assertEqual(sum(stats['bfs']['buckets'].values()), 1)
+
+    async def test_long_line_gets_error(self):
+        connect = await self.start(DirectedGraph(EDGES))
+        reader, writer = await connect()
+        writer.write(b'{"id": 1, "method": "bfs", "args": [' + b'0, ' * self.server.limit + b'0]}\n')
+        await writer.drain()
+        response = json.loads(await asyncio.wait_for(reader.readline(), 5))
+        self.assertIn('request line longer than', response['error'])
+
+        # the server hangs up, unread request bytes can turn the close into a reset
+        try:
+            self.assertEqual(await asyncio.wait_for(reader.read(), 5), b'')
+        except ConnectionResetError:
+            pass
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), 'Unix sockets not supported')
+    async def test_unix_socket(self):
+        self.writers = []
+        self.server = GraphQueryServer(UndirectedGraph(['AB', 'BC', 'DE']))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.sock')
+            await self.server.start_unix(path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            self.writers.append(writer)
+            responses = await send(reader, writer, [{'id': 1, 'method': 'count_connected_components'},
+                                                    {'id': 2, 'method': 'bfs', 'args': ['A']}])
+        self.assertEqual(responses[0]['result'], 2)
+        self.assertEqual(responses[1]['result'], ['A', 'B', 'C'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+# Description:  Tests for ud_graph.py. Minimum spanning forests are checked against Kruskal's algorithm on random
+#               graphs
+
+import random
+import string
+import unittest
+
+from ud_graph import UndirectedGraph, UndirectedGraphView
+
+
+def kruskal_total(graph: UndirectedGraph):
+    """
+    Returns the weight of a minimum spanning forest found with Kruskal's algorithm and union-find
+    """
+    parent = {v: v for v in graph.get_vertices()}
+
+    def find(v):
+        while parent[v] != v:
+            v = parent[v]
+        return v
+
+    total = 0
+    for u, v in sorted(graph.get_edges(), key=lambda edge: graph.get_weight(*edge)):
+        root_u, root_v = find(u), find(v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+            total += graph.get_weight(u, v)
+    return total
+
+
+def random_graph(rng, vertices: int, edges: int) -> UndirectedGraph:
+    """
+    Returns a weighted graph with the given number of vertices and up to the given number of random edges
+    """
+    names = string.ascii_uppercase[:vertices]
+    graph = UndirectedGraph()
+    for v in names:
+        graph.add_vertex(v)
+    for x in range(edges):
+        graph.add_edge(rng.choice(names), rng.choice(names), rng.choice([rng.randint(1, 20), rng.random() * 10]))
+    return graph
+
+
+class WeightedUndirectedGraphTest(unittest.TestCase):
+
+    def test_minimum_spanning_forest_matches_kruskal(self):
+        rng = random.Random(28)
+        for x in range(200):
+            vertices = rng.randint(1, 12)
+            graph = random_graph(rng, vertices, rng.randint(0, 2 * vertices))
+            for y in range(rng.randint(0, 3)):
+                edges = graph.get_edges()
+                if len(edges) != 0:
+                    graph.remove_edge(*rng.choice(edges))
+
+            total, edges = graph.minimum_spanning_forest()
+            self.assertAlmostEqual(total, kruskal_total(graph))
+            self.assertAlmostEqual(total, sum(weight for u, v, weight in edges))
+            components = graph.count_connected_components()
+            self.assertEqual(len(edges), len(graph.get_vertices()) - components)
+            for u, v, weight in edges:
+                self.assertEqual(graph.get_weight(u, v), weight)
+
+    def test_disconnected_forest(self):
+        graph = UndirectedGraph([('A', 'B', 4), ('B', 'C', 1), ('A', 'C', 2), ('D', 'E', 7), 'FG'])
+        graph.add_vertex('H')
+        total, edges = graph.minimum_spanning_forest()
+        self.assertEqual(total, 1 + 2 + 7 + 1)
+        self.assertEqual(sorted(tuple(sorted((u, v))) for u, v, weight in edges),
+                         [('A', 'C'), ('B', 'C'), ('D', 'E'), ('F', 'G')])
+        self.assertEqual(UndirectedGraph().minimum_spanning_forest(), (0, []))
+
+    def test_constructor_accepts_pairs_and_triples(self):
+        graph = UndirectedGraph(['AB', ('B', 'C'), ('C', 'D', 2.5)])
+        self.assertEqual(graph.get_weight('A', 'B'), 1)
+        self.assertEqual(graph.get_weight('C', 'B'), 1)
+        self.assertEqual(graph.get_weight('D', 'C'), 2.5)
+        self.assertIsNone(graph.get_weight('A', 'D'))
+
+    def test_readding_edge_updates_weight(self):
+        graph = UndirectedGraph([('A', 'B', 5)])
+        graph.add_edge('B', 'A', 3)
+        self.assertEqual(graph.get_weight('A', 'B'), 3)
+        self.assertEqual(graph.get_weight('B', 'A'), 3)
+        self.assertEqual(graph.adj_list, {'A': ['B'], 'B': ['A']})
+
+    def test_removing_drops_weights(self):
+        graph = UndirectedGraph([('A', 'B', 5), ('B', 'C', 2), ('C', 'A', 1), ('C', 'D', 4)])
+        graph.remove_edge('B', 'A')
+        self.assertNotIn(('A', 'B'), graph.weights)
+        self.assertNotIn(('B', 'A'), graph.weights)
+
+        graph.remove_vertex('C')
+        for v in 'ABD':
+            self.assertNotIn(('C', v), graph.weights)
+            self.assertNotIn((v, 'C'), graph.weights)
+        self.assertEqual(graph.weights, {})
+
+    def test_invalid_edges(self):
+        for edges in (['ABC'], [('A', 'B', '3')], [('A', 'B', True)], [('A', 'B', None)]):
+            with self.assertRaises(TypeError):
+                UndirectedGraph(edges)
+        for edges in (['A'], [('A', 'B', 1, 2)], [('A', 'B', float('nan'))], [('A', 'B', float('inf'))]):
+            with self.assertRaises(ValueError):
+                UndirectedGraph(edges)
+
+        graph = UndirectedGraph()
+        with self.assertRaises(TypeError):
+            graph.add_edge('A', 'B', False)
+        with self.assertRaises(ValueError):
+            graph.add_edge('A', 'B', float('-inf'))
+        self.assertEqual(graph.adj_list, {})
+
+
+def copy_subgraph(graph: UndirectedGraph, vertices, predicate=None) -> UndirectedGraph:
+    """
+    Returns a new graph holding the subgraph of the given vertices with only the edges the predicate keeps
+    """
+    copy = UndirectedGraph()
+    for v in vertices:
+        if v in graph.adj_list:
+            copy.add_vertex(v)
+    for u, v in graph.get_edges():
+        weight = graph.get_weight(u, v)
+        first, second = sorted((u, v))
+        if u in copy.adj_list and v in copy.adj_list and (predicate is None or predicate(first, second, weight)):
+            copy.add_edge(u, v, weight)
+    return copy
+
+
+class UndirectedGraphViewTest(unittest.TestCase):
+
+    def assert_same_answers(self, view: UndirectedGraph, copy: UndirectedGraph) -> None:
+        """
+        Checks that every query method gives the same answer on the view and on the copied graph
+        """
+        self.assertEqual(sorted(view.get_vertices()), sorted(copy.get_vertices()))
+        self.assertEqual(sorted(map(sorted, view.get_edges())), sorted(map(sorted, copy.get_edges())))
+        self.assertAlmostEqual(view.minimum_spanning_forest()[0], copy.minimum_spanning_forest()[0])
+        if len(copy.adj_list) != 0:
+            self.assertEqual(view.has_cycle(), copy.has_cycle())
+            self.assertEqual(view.count_connected_components(), copy.count_connected_components())
+        for u in copy.get_vertices():
+            self.assertEqual(view.dfs(u), copy.dfs(u))
+            self.assertEqual(view.bfs(u), copy.bfs(u))
+            self.assertEqual(view.is_valid_path([u]), copy.is_valid_path([u]))
+            for v in copy.get_vertices():
+                self.assertEqual(view.get_weight(u, v), copy.get_weight(u, v))
+                self.assertEqual(view.is_valid_path([u, v]), copy.is_valid_path([u, v]))
+
+    def test_random_views_match_copies(self):
+        rng = random.Random(29)
+        heavy = lambda u, v, weight: weight > 5
+        for x in range(60):
+            graph = random_graph(rng, 10, 20)
+            vertices = rng.sample(graph.get_vertices(), rng.randint(1, 10)) + ['ZZ']
+            self.assert_same_answers(graph.subgraph(vertices), copy_subgraph(graph, vertices))
+            self.assert_same_answers(graph.filter_edges(heavy), copy_subgraph(graph, graph.get_vertices(), heavy))
+            self.assert_same_answers(graph.subgraph(vertices).filter_edges(heavy),
+                                     copy_subgraph(graph, vertices, heavy))
+
+    def test_view_sees_parent_changes(self):
+        graph = UndirectedGraph([('A', 'B', 1), ('B', 'C', 2), ('C', 'D', 3)])
+        view = graph.subgraph('ABC')
+        self.assertIsInstance(view, UndirectedGraphView)
+        self.assertFalse(view.has_cycle())
+
+        graph.add_edge('A', 'C', 7)
+        graph.add_edge('A', 'D', 1)
+        self.assertTrue(view.has_cycle())
+        self.assertEqual(view.adj_list['A'], ['B', 'C'])
+        self.assertEqual(view.get_weight('C', 'A'), 7)
+        self.assertIsNone(view.get_weight('A', 'D'))
+
+        graph.remove_vertex('B')
+        self.assertEqual(sorted(view.get_vertices()), ['A', 'C'])
+        self.assertEqual(view.minimum_spanning_forest(), (7, [('A', 'C', 7)]))
+
+    def test_asymmetric_predicate_is_symmetric(self):
+        graph = UndirectedGraph(['AB', 'BC', 'CA'])
+        view = graph.filter_edges(lambda u, v, weight: u == 'A')
+        self.assertEqual(dict(view.adj_list), {'A': ['B', 'C'], 'B': ['A'], 'C': ['A']})
+        self.assertFalse(view.has_cycle())
+        self.assertTrue(view.is_valid_path(['B', 'A', 'C']))
+        self.assertFalse(view.is_valid_path(['B', 'C']))
+
+    def test_views_are_read_only(self):
+        view = UndirectedGraph(['AB']).subgraph('AB')
+        changes = (lambda: view.add_vertex('C'), lambda: view.add_edge('A', 'C'),
+                   lambda: view.remove_edge('A', 'B'), lambda: view.remove_vertex('A'))
+        for change in changes:
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(view.get_edges(), [('A', 'B')])
+
+
+if __name__ == '__main__':
+    unittest.main()
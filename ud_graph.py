@@ -4,32 +4,43 @@
 # Description:  This file contains a class for an undirected graph using a dictionary with a list for each key
 #               to store links between nodes. It also has methods to add vertices, edges, remove vertices and edges,
 #               find out if a path is valid, depth and breadth first searches, the number of components in the graph
-#               and if the graph contains a cycle or not
+#               and if the graph contains a cycle or not. Edges can have optional weights, which are used to find a
+#               minimum spanning forest with Prim's algorithm. Read only subgraph and filtered edge views can be taken
+#               without copying the adjacency lists
 
 import heapq
+import math
 from collections import deque
+from collections.abc import Mapping
 
 class UndirectedGraph:
     """
     Class to implement undirected graph
     - duplicate edges not allowed
     - loops not allowed
-    - no edge weights
+    - optional edge weights (default 1)
     - vertex names are strings
     """
 
     def __init__(self, start_edges=None):
         """
-        Store graph info as adjacency list
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Store graph info as adjacency list, with the edge weights in a dictionary keyed by (u, v) and (v, u)
         """
         self.adj_list = dict()
+        self.weights = dict()
 
         # populate graph with initial vertices and edges (if provided)
-        # before using, implement add_vertex() and add_edge() methods
+        # edges are (u, v) pairs or (u, v, weight) triples
         if start_edges is not None:
-            for u, v in start_edges:
-                self.add_edge(u, v)
+            for edge in start_edges:
+                if len(edge) == 2:
+                    u, v = edge
+                    self.add_edge(u, v)
+                elif len(edge) == 3:
+                    u, v, weight = edge
+                    self.add_edge(u, v, weight)
+                else:
+                    raise ValueError(f'edges must be (u, v) or (u, v, weight), got {edge!r}')
 
     def __str__(self):
         """
@@ -52,12 +63,18 @@ class UndirectedGraph:
         if v not in self.adj_list:
             self.adj_list[v] = []
 
-    def add_edge(self, u: str, v: str) -> None:
+    def add_edge(self, u: str, v: str, weight=1) -> None:
         """
-        Add edge to the graph
+        Add edge to the graph, or update its weight if it already exists. The weight must be a finite number
         """
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+            raise TypeError(f'edge weight must be a number, got {weight!r}')
+        if not math.isfinite(weight):
+            raise ValueError(f'edge weight must be finite, got {weight!r}')
         if u == v:
             return
+        self.weights[(u, v)] = weight
+        self.weights[(v, u)] = weight
         if v not in self.adj_list:
             self.adj_list[v] = []
         if u not in self.adj_list:
@@ -78,6 +95,8 @@ class UndirectedGraph:
         if v in self.adj_list[u] and u in self.adj_list[v]:
             self.adj_list[u].remove(v)
             self.adj_list[v].remove(u)
+            del self.weights[(u, v)]
+            del self.weights[(v, u)]
 
     def remove_vertex(self, v: str) -> None:
         """
@@ -89,6 +108,8 @@ class UndirectedGraph:
             for vertex in self.adj_list.items():
                 if v in vertex[1]:
                     vertex[1].remove(v)
+                    del self.weights[(v, vertex[0])]
+                    del self.weights[(vertex[0], v)]
 
     def get_vertices(self) -> []:
         """
@@ -269,6 +290,174 @@ class UndirectedGraph:
 
         return False
 
+    def get_weight(self, u: str, v: str):
+        """
+        Return the weight of the edge between u and v, or None if there is no edge
+        """
+        return self.weights.get((u, v))
+
+    def minimum_spanning_forest(self):
+        """
+        Return the total weight and the list of (u, v, weight) edges of a minimum spanning forest, using Prim's
+        algorithm with a binary heap. Each connected component gets its own tree
+        """
+        total = 0
+        edges = []
+        visited = set()
+
+        for root in self.adj_list:
+            if root in visited:
+                continue
+
+            # Grow a tree from root, always taking the lightest edge that leaves the tree
+            visited.add(root)
+            heap = [(self.weights[(root, vertex)], root, vertex) for vertex in self.adj_list[root]]
+            heapq.heapify(heap)
+
+            while len(heap) != 0:
+                weight, u, v = heapq.heappop(heap)
+                if v in visited:
+                    continue
+
+                visited.add(v)
+                total += weight
+                edges.append((u, v, weight))
+
+                for vertex in self.adj_list[v]:
+                    if vertex not in visited:
+                        heapq.heappush(heap, (self.weights[(v, vertex)], v, vertex))
+
+        return total, edges
+
+    def subgraph(self, vertices: []):
+        """
+        Return a read only view of the graph induced by the given vertices, vertices that aren't in the graph are
+        skipped
+        """
+        return UndirectedGraphView(self, vertices=vertices)
+
+    def filter_edges(self, predicate):
+        """
+        Return a read only view of the graph that only keeps the edges where predicate(u, v, weight) is True. The
+        predicate is always called with u < v, so an edge is kept or dropped from both ends
+        """
+        return UndirectedGraphView(self, predicate=predicate)
+
+
+class UndirectedGraphView(UndirectedGraph):
+    """
+    Read only view of an UndirectedGraph
+    - reads the parent's adjacency lists on every access, so nothing is copied and changes to the parent show up
+    - vertices keep their names
+    - supports every query method of UndirectedGraph, including further subgraph() and filter_edges() calls
+    """
+
+    def __init__(self, parent, vertices=None, predicate=None):
+        """
+        Store the parent graph along with the vertex set or edge predicate
+        """
+        self.parent = parent
+        self.predicate = predicate
+        self.vertex_set = None if vertices is None else dict.fromkeys(vertices)
+        self.adj_list = AdjacencyView(self)
+        self.weights = parent.weights
+
+    def has_vertex(self, v: str) -> bool:
+        """
+        Return True if the vertex is in the view, False otherwise
+        """
+        if self.vertex_set is not None and v not in self.vertex_set:
+            return False
+        return v in self.parent.adj_list
+
+    def neighbours(self, v: str) -> []:
+        """
+        Return the sorted list of vertices linked to v in the view
+        """
+        out = []
+        for u in self.parent.adj_list[v]:
+            if self.vertex_set is not None and u not in self.vertex_set:
+                continue
+            if self.predicate is not None:
+                first, second = (v, u) if v < u else (u, v)
+                if not self.predicate(first, second, self.weights[(v, u)]):
+                    continue
+            out.append(u)
+        return out
+
+    def get_weight(self, u: str, v: str):
+        """
+        Return the weight of the edge between u and v, or None if there is no edge in the view
+        """
+        if u not in self.adj_list or v not in self.adj_list[u]:
+            return None
+        return self.weights[(u, v)]
+
+    def add_vertex(self, v: str) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+    def add_edge(self, u: str, v: str, weight=1) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+    def remove_edge(self, v: str, u: str) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+    def remove_vertex(self, v: str) -> None:
+        """
+        Views are read only, raises TypeError
+        """
+        raise TypeError('graph views are read only')
+
+
+class AdjacencyView(Mapping):
+    """
+    Stands in for the adjacency list dictionary of an UndirectedGraphView
+    """
+
+    def __init__(self, view):
+        """
+        Store the view the adjacency lists belong to
+        """
+        self.view = view
+
+    def __getitem__(self, v):
+        """
+        Return the sorted list of vertices linked to v, raises KeyError if v is not in the view
+        """
+        if not self.view.has_vertex(v):
+            raise KeyError(v)
+        return self.view.neighbours(v)
+
+    def __contains__(self, v):
+        """
+        Return True if v is a vertex of the view, False otherwise
+        """
+        return self.view.has_vertex(v)
+
+    def __iter__(self):
+        """
+        Return every vertex of the view
+        """
+        vertices = self.view.parent.adj_list if self.view.vertex_set is None else self.view.vertex_set
+        for v in vertices:
+            if self.view.has_vertex(v):
+                yield v
+
+    def __len__(self):
+        """
+        Return the number of vertices in the view
+        """
+        return sum(1 for v in self)
+
 if __name__ == '__main__':
 
     # print("\nPDF - method add_vertex() / add_edge example 1")